@@ -1,12 +1,43 @@
 import os
-import json
+import orjson
 import logging
+from functools import lru_cache
 from huaweicloudsdkcore.auth.credentials import BasicCredentials
-from huaweicloudsdkcce.v3 import CceClient, ListClustersRequest, ShowClusterRequest
+from huaweicloudsdkcce.v3 import CceClient, ListClustersRequest
 from huaweicloudsdkcce.v3.region.cce_region import CceRegion
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Output file buffer size; streamed records are flushed in large writes
+WRITE_BUFFER_SIZE = 1 << 20
+
+def get_env_flag(name):
+    """
+    Read an on/off setting from an environment variable.
+
+    Accepts 1/true/yes/on and 0/false/no/off in any case, or any integer
+    (non-zero means on). An unset or empty variable means off.
+
+    Args:
+        name (str): The name of the environment variable.
+
+    Returns:
+        bool: True if the setting is on, False otherwise.
+
+    Raises:
+        ValueError: If the variable holds any other value.
+    """
+    value = os.environ.get(name, '').strip().lower()
+    if value in ('', 'false', 'no', 'off'):
+        return False
+    if value in ('true', 'yes', 'on'):
+        return True
+    try:
+        return int(value) != 0
+    except ValueError:
+        raise ValueError(f"{name} must be 1/0, true/false, yes/no or on/off, got {value!r}.")
 
 def serialize_endpoints(endpoints):
     """
@@ -20,6 +51,143 @@ def serialize_endpoints(endpoints):
     """
     return [{'url': endpoint.url, 'type': endpoint.type} for endpoint in endpoints]
 
+def get_cluster_records(clusters, region):
+    """
+    Builds the summary record for each cluster.
+
+    Args:
+        clusters (list): Cluster objects returned by ListClusters.
+        region (str): The region the clusters belong to.
+
+    Yields:
+        dict: The summary record, one cluster at a time.
+    """
+    for cluster_detail in clusters:
+        # Guard the debug log so SDK models are not formatted at INFO level
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Processing cluster %s", cluster_detail.metadata)
+
+        # Collect detailed information
+        yield {
+            'Cluster Name': cluster_detail.metadata.name,
+            'Cluster ID': cluster_detail.metadata.uid,
+            'Status': cluster_detail.status.phase,
+            'Created': cluster_detail.metadata.creation_timestamp,
+            'Version': cluster_detail.spec.version,
+            'Cluster Type': cluster_detail.spec.type,
+            'Flavor': cluster_detail.spec.flavor,
+            'Region': region,
+            'Network Mode': getattr(cluster_detail.spec.host_network, 'mode', 'N/A'),
+            'Container Network': cluster_detail.spec.container_network.mode,
+            'Authentication': cluster_detail.spec.authentication.mode,
+            'Billing Mode': cluster_detail.spec.billing_mode,
+            'Labels': cluster_detail.metadata.labels,
+            'Annotations': cluster_detail.metadata.annotations,
+            'Endpoints': serialize_endpoints(cluster_detail.status.endpoints)
+        }
+
+def save_data_to_json(records, filename, indent, rows=None):
+    """
+    Streams cluster records to a JSON file as UTF-8 encoded JSON, one record at a time.
+    Records are written to a temporary file next to the target, which only replaces
+    the target once the whole array has been written, so a failed run leaves the
+    previous output untouched.
+
+    Args:
+        records (iterable): The cluster records to be saved.
+        filename (str): The name of the file where the data will be saved.
+        indent (bool): Whether to pretty-print the output instead of minifying it.
+        rows (list): Optional list that each written record is also appended to.
+
+    Raises:
+        RuntimeError: If building or writing the records fails.
+    """
+    option = orjson.OPT_INDENT_2 if indent else None
+    newline = b'\n' if indent else b''
+
+    temp_filename = f'{filename}.{os.getpid()}.tmp'
+    try:
+        with open(temp_filename, 'wb', buffering=WRITE_BUFFER_SIZE) as json_file:
+            json_file.write(b'[')
+            separator = newline
+            for cluster_info in records:
+                json_file.write(separator)
+                json_file.write(orjson.dumps(cluster_info, option=option))
+                separator = b',' + newline
+                if rows is not None:
+                    rows.append(cluster_info)
+            json_file.write(newline + b']')
+        os.replace(temp_filename, filename)
+    except Exception as e:
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+        raise RuntimeError(f"Failed to build or save CCE cluster data to JSON file: {str(e)}")
+
+def to_columns(records):
+    """
+    Pivot cluster records into a column-oriented layout with one list per field.
+
+    Args:
+        records (iterable): The cluster records to pivot.
+
+    Returns:
+        dict: A dictionary mapping each field name to the list of its values.
+    """
+    columns = {}
+    for cluster_info in records:
+        for key, value in cluster_info.items():
+            columns.setdefault(key, []).append(value)
+    return columns
+
+def save_columns_to_json(records, filename, indent):
+    """
+    Save cluster records to a JSON file in column-oriented layout for analytics tools.
+    The file is written next to the target first and only replaces it once complete.
+
+    Args:
+        records (iterable): The cluster records to be saved.
+        filename (str): The name of the file where the data will be saved.
+        indent (bool): Whether to pretty-print the output instead of minifying it.
+
+    Raises:
+        RuntimeError: If writing the file fails.
+    """
+    option = orjson.OPT_INDENT_2 if indent else None
+
+    temp_filename = f'{filename}.{os.getpid()}.tmp'
+    try:
+        with open(temp_filename, 'wb', buffering=WRITE_BUFFER_SIZE) as json_file:
+            json_file.write(orjson.dumps(to_columns(records), option=option))
+        os.replace(temp_filename, filename)
+    except Exception as e:
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+        raise RuntimeError(f"Failed to save columnar CCE cluster data to JSON file: {str(e)}")
+
+@lru_cache(maxsize=8)
+def get_cce_client(ak, sk, project_id, region):
+    """
+    Initializes and returns the CCE client for the given credentials and region.
+    Clients are cached, so repeated calls with the same arguments reuse one client.
+
+    Args:
+        ak (str): The access key.
+        sk (str): The secret key.
+        project_id (str): The project ID.
+        region (str): The region the client connects to.
+
+    Returns:
+        CceClient: Initialized CCE client.
+    """
+    # Set up the credentials
+    credentials = BasicCredentials(ak, sk, project_id)
+
+    # Initialize the CCE client with the correct region
+    return CceClient.new_builder() \
+        .with_credentials(credentials) \
+        .with_region(CceRegion.value_of(region)) \
+        .build()
+
 def get_cce_summary():
     """
     Fetches and stores the summary of CCE clusters in a JSON file.
@@ -39,67 +207,36 @@ def get_cce_summary():
         if not all([ak, sk, project_id, region]):
             raise ValueError("One or more environment variables are not set.")
 
-        # Set up the credentials
-        credentials = BasicCredentials(ak, sk, project_id)
+        # Output is minified unless indentation is requested via ECS_JSON_INDENT
+        indent = get_env_flag('ECS_JSON_INDENT')
+        # A column-oriented copy is also written when ECS_JSON_COLUMNAR is on
+        columnar = get_env_flag('ECS_JSON_COLUMNAR')
 
-        # Initialize the CCE client with the correct region
-        cce_client = CceClient.new_builder() \
-            .with_credentials(credentials) \
-            .with_region(CceRegion.value_of(region)) \
-            .build()
+        cce_client = get_cce_client(ak, sk, project_id, region)
 
-        # Create a request to list CCE clusters
-        list_clusters_request = ListClustersRequest()
+        # Create a request to list CCE clusters; with detail enabled the items
+        # already carry the full cluster spec, so no per-cluster ShowCluster is needed
+        list_clusters_request = ListClustersRequest(detail='true')
 
         # Send the request and get the response
         clusters_response = cce_client.list_clusters(list_clusters_request)
 
-        # Extract and format the data
-        cce_data = []
-        for cluster_summary in clusters_response.items:
-            # Fetch detailed information for each cluster
-            cluster_id = cluster_summary.metadata.uid
-            show_cluster_request = ShowClusterRequest(cluster_id=cluster_id)
-
-            # Get the response
-            cluster_response = cce_client.show_cluster(show_cluster_request)
-            
-            # Assuming the correct attribute to access the cluster details
-            cluster_detail = cluster_response
-
-            # Collect detailed information
-            cluster_info = {
-                'Cluster Name': cluster_detail.metadata.name,
-                'Cluster ID': cluster_detail.metadata.uid,
-                'Status': cluster_detail.status.phase,
-                'Created': cluster_detail.metadata.creation_timestamp,
-                'Version': cluster_detail.spec.version,
-                'Cluster Type': cluster_detail.spec.type,
-                'Flavor': cluster_detail.spec.flavor,
-                'Region': region,
-                'Network Mode': getattr(cluster_detail.spec.host_network, 'mode', 'N/A'),
-                'Container Network': cluster_detail.spec.container_network.mode,
-                'Authentication': cluster_detail.spec.authentication.mode,
-                'Billing Mode': cluster_detail.spec.billing_mode,
-                'Labels': cluster_detail.metadata.labels,
-                'Annotations': cluster_detail.metadata.annotations,
-                'Endpoints': serialize_endpoints(cluster_detail.status.endpoints)
-            }
-            cce_data.append(cluster_info)
-
-        # Convert the data to JSON format
-        cce_data_json = json.dumps(cce_data, indent=4)
-
-        # Save the JSON data to a file
-        with open('cce_clusters_detailed_info.json', 'w') as json_file:
-            json_file.write(cce_data_json)
-        
-        logging.info("CCE cluster summary has been saved to 'cce_clusters_detailed_info.json'.")
+        records = get_cluster_records(clusters_response.items, region)
+
+        # The columnar copy needs every record at once, so only then are they kept
+        rows = [] if columnar else None
+
+        save_data_to_json(records, 'cce_clusters_detailed_info.json', indent, rows)
+        logger.info("CCE cluster summary has been saved to 'cce_clusters_detailed_info.json'.")
+
+        if columnar:
+            save_columns_to_json(rows, 'cce_clusters_detailed_info_columns.json', indent)
+            logger.info("Columnar CCE cluster summary has been saved to 'cce_clusters_detailed_info_columns.json'.")
 
     except ValueError as ve:
-        logging.error("ValueError: %s", ve)
+        logger.error("ValueError: %s", ve)
     except Exception as e:
-        logging.exception("An error occurred while fetching the CCE cluster summary: %s", e)
+        logger.exception("An error occurred while fetching the CCE cluster summary: %s", e)
 
 if __name__ == "__main__":
     get_cce_summary()
@@ -1,29 +1,64 @@
-import json
+import orjson
 from datetime import datetime
 import os
 import ipaddress
+import re
+import socket
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from huaweicloudsdkcore.auth.credentials import BasicCredentials
 from huaweicloudsdkecs.v2 import EcsClient, ListServersDetailsRequest, ListFlavorsRequest
 from huaweicloudsdkecs.v2.region.ecs_region import EcsRegion
 
+# Maximum page size accepted by ListServersDetails
+SERVER_PAGE_SIZE = 1000
+
+# Upper bound on concurrent page requests; keep it below the API throttling limit
+MAX_WORKERS = 8
+
+# Strict dotted-quad IPv4 address: four decimal octets without leading zeros
+IPV4_OCTET = r'(?:25[0-5]|2[0-4][0-9]|1[0-9][0-9]|[1-9]?[0-9])'
+IPV4_PATTERN = re.compile(rf'{IPV4_OCTET}(?:\.{IPV4_OCTET}){{3}}')
+
+# Output file buffer size; streamed records are flushed in large writes
+WRITE_BUFFER_SIZE = 1 << 20
+
+def get_env_flag(name):
+    """
+    Reads an on/off setting from an environment variable.
+    Accepts 1/true/yes/on and 0/false/no/off in any case, or any integer
+    (non-zero means on). An unset or empty variable means off.
+    Raises a ValueError for any other value.
+    Args:
+        name (str): The name of the environment variable.
+    Returns:
+        bool: True if the setting is on, False otherwise.
+    """
+    value = os.environ.get(name, '').strip().lower()
+    if value in ('', 'false', 'no', 'off'):
+        return False
+    if value in ('true', 'yes', 'on'):
+        return True
+    try:
+        return int(value) != 0
+    except ValueError:
+        raise ValueError(f"{name} must be 1/0, true/false, yes/no or on/off, got {value!r}.")
+
 # Function to get ECS client
-def get_ecs_client():
+@lru_cache(maxsize=8)
+def get_ecs_client(ak, sk, project_id, region):
     """
-    Initializes and returns the ECS client using environment variables.
-    Raises a ValueError if any required environment variables are missing.
+    Initializes and returns the ECS client for the given credentials and region.
+    Clients are cached, so repeated calls with the same arguments reuse one client.
+    Args:
+        ak (str): The access key.
+        sk (str): The secret key.
+        project_id (str): The project ID.
+        region (str): The region the client connects to.
     Returns:
         EcsClient: Initialized ECS client.
     """
-    # Access environment variables
-    ak = os.environ.get('HUAWEI_ACCESS_KEY')
-    sk = os.environ.get('HUAWEI_SECRET_KEY')
-    project_id = os.environ.get('HUAWEI_PROJECT_ID')
-    region = os.environ.get('HUAWEI_REGION')
-
-    # Ensure all necessary environment variables are set
-    if not all([ak, sk, project_id, region]):
-        raise ValueError("One or more environment variables are not set.")
-
     # Set up the credentials
     credentials = BasicCredentials(ak, sk, project_id)
 
@@ -35,60 +70,94 @@ def get_ecs_client():
 
 def get_flavor_dict(client):
     """
-    Fetches the list of flavors and creates a dictionary mapping flavor IDs to flavor details.
+    Fetches the list of flavors and creates a dictionary mapping flavor IDs to flavor specs.
     Args:
         client (EcsClient): The ECS client used to send the request.
     Returns:
-        dict: A dictionary mapping flavor IDs to flavor details.
+        dict: A dictionary mapping flavor IDs to formatted flavor spec strings.
     """
     flavor_request = ListFlavorsRequest()
 
     try:
         # Send the request and get the flavor response
         flavor_response = client.list_flavors(flavor_request)
-        # Map flavor IDs to flavor details
-        return {flavor.id: flavor for flavor in flavor_response.flavors}
+        # Map flavor IDs to flavor specs, formatted once per flavor rather than per server
+        return {
+            flavor.id: f"{flavor.name} | {flavor.vcpus} vCPUs | {flavor.ram / 1024} GiB | {flavor.id}"
+            for flavor in flavor_response.flavors
+        }
 
     except Exception as e:
         raise RuntimeError(f"Failed to fetch flavors: {str(e)}")
 
+@lru_cache(maxsize=8192)
 def is_private_ip(ip):
     """
     Checks if the given IP address is private.
+    Dotted-quad IPv4 addresses are matched against the private (10/8, 172.16/12,
+    192.168/16), loopback (127/8) and link-local (169.254/16) ranges with integer
+    masks; anything else falls back to the ipaddress module.
     Args:
         ip (str): The IP address to check.
     Returns:
         bool: True if the IP is private, False otherwise.
     """
-    try:
-        ip_obj = ipaddress.ip_address(ip)
-        return ip_obj.is_private
-    except ValueError:
-        return False  # Return False if the IP address is invalid
+    if not isinstance(ip, str):
+        return False  # Missing or non-string address
+
+    if not IPV4_PATTERN.fullmatch(ip):
+        # Not a plain dotted-quad IPv4 address, most likely IPv6
+        try:
+            return ipaddress.ip_address(ip).is_private
+        except ValueError:
+            return False  # Return False if the IP address is invalid
 
-def get_ecs_servers(client, flavor_dict):
+    ip_int = struct.unpack('!I', socket.inet_aton(ip))[0]
+    return ((ip_int & 0xFF000000) == 0x0A000000 or
+            (ip_int & 0xFFF00000) == 0xAC100000 or
+            (ip_int & 0xFFFF0000) == 0xC0A80000 or
+            (ip_int & 0xFF000000) == 0x7F000000 or
+            (ip_int & 0xFFFF0000) == 0xA9FE0000)
+
+def list_servers(client):
     """
-    Fetches ECS server details and maps them with the corresponding flavor details.
+    Fetches the ECS server details, requesting all pages concurrently.
     Args:
         client (EcsClient): The ECS client used to send the request.
-        flavor_dict (dict): A dictionary containing flavor details keyed by flavor ID.
     Returns:
-        list: A list of ECS server information.
+        list: A list of ECS server detail objects.
     """
-    server_request = ListServersDetailsRequest()
-
     try:
-        # Send the request and get the server response
-        server_response = client.list_servers_details(server_request)
+        # The first page also reports the total number of servers
+        first_page = client.list_servers_details(ListServersDetailsRequest(offset=1, limit=SERVER_PAGE_SIZE))
+        servers = list(first_page.servers or [])
+
+        # Fetch the remaining pages (offset is a 1-based page number) in parallel
+        page_count = -(-(first_page.count or 0) // SERVER_PAGE_SIZE)
+        page_requests = [ListServersDetailsRequest(offset=page, limit=SERVER_PAGE_SIZE)
+                         for page in range(2, page_count + 1)]
+        if page_requests:
+            with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+                for page in executor.map(client.list_servers_details, page_requests):
+                    servers.extend(page.servers or [])
+
+        return servers
     except Exception as e:
         raise RuntimeError(f"Failed to fetch ECS servers: {str(e)}")
 
-    ecs_data = []
-
+def get_ecs_servers(servers, flavor_dict, region):
+    """
+    Maps ECS server details with the corresponding flavor details.
+    Args:
+        servers (list): The ECS server detail objects.
+        flavor_dict (dict): A dictionary containing flavor specs keyed by flavor ID.
+        region (str): The region the servers belong to.
+    Yields:
+        dict: The ECS server information, one server at a time.
+    """
     # Iterate over each server and extract relevant details
-    for server in server_response.servers:
-        flavor = flavor_dict.get(server.flavor.id)
-        flavor_spec = f"{flavor.name} | {flavor.vcpus} vCPUs | {flavor.ram / 1024} GiB | {flavor.id}" if flavor else "Flavor details not available"
+    for server in servers:
+        flavor_spec = flavor_dict.get(server.flavor.id, "Flavor details not available")
 
         # Server Summary
         server_summary = {
@@ -100,23 +169,21 @@ def get_ecs_servers(client, flavor_dict):
             'Updated': server.updated,
             'Image ID': server.image.id,
             'Key Name': server.key_name,
-            'Region': os.environ.get('HUAWEI_REGION')
+            'Region': region
         }
 
-        # Network Interfaces
-        network_interfaces = []
-        for net_name, net_info in server.addresses.items():
-            for addr in net_info:
-                # Determine whether the IP is private or public
-                ip_type = 'private' if is_private_ip(addr.addr) else 'public'
-                interface_info = {
-                    'Network Name': net_name,
-                    'Address': addr.addr,
-                    'Type': ip_type,  # Set based on public/private check
-                    'MAC Address': getattr(addr, 'mac_addr', None),
-                    'Version': getattr(addr, 'version', None)
-                }
-                network_interfaces.append(interface_info)
+        # Network Interfaces, typed as private or public based on the address
+        network_interfaces = [
+            {
+                'Network Name': net_name,
+                'Address': addr.addr,
+                'Type': 'private' if is_private_ip(addr.addr) else 'public',
+                'MAC Address': addr.os_ext_ip_smac_addr,
+                'Version': addr.version
+            }
+            for net_name, net_info in server.addresses.items()
+            for addr in net_info
+        ]
 
         # Security Groups
         security_groups = [sg.name for sg in server.security_groups]
@@ -137,49 +204,133 @@ def get_ecs_servers(client, flavor_dict):
             'Host Security': host_security
         }
 
-        ecs_data.append(ecs_info)
+        yield ecs_info
 
-    return ecs_data
+def save_data_to_json(ecs_data, filename, indent, rows=None):
+    """
+    Saves ECS data to a JSON file, writing one record at a time.
+    Records are streamed into a temporary file next to the target, which only
+    replaces the target once the whole array has been written.
+    Args:
+        ecs_data (iterable): The ECS data to be saved.
+        filename (str): The name of the file where the data will be saved.
+        indent (bool): Whether to pretty-print the output instead of minifying it.
+        rows (list): Optional list that each written record is also appended to.
+    """
+    option = orjson.OPT_INDENT_2 if indent else None
+    newline = b'\n' if indent else b''
 
-def save_data_to_json(ecs_data, filename):
+    temp_filename = f'{filename}.{os.getpid()}.tmp'
+    try:
+        with open(temp_filename, 'wb', buffering=WRITE_BUFFER_SIZE) as json_file:
+            json_file.write(b'[')
+            separator = newline
+            for ecs_info in ecs_data:
+                json_file.write(separator)
+                json_file.write(orjson.dumps(ecs_info, option=option))
+                separator = b',' + newline
+                if rows is not None:
+                    rows.append(ecs_info)
+            json_file.write(newline + b']')
+        os.replace(temp_filename, filename)
+    except Exception as e:
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+        raise RuntimeError(f"Failed to build or save ECS data to JSON file: {str(e)}")
+
+def to_columns(ecs_data):
     """
-    Saves ECS data to a JSON file.
+    Pivots ECS records into a column-oriented layout with one list per field.
+    Server summary fields become top-level columns; the remaining sections are
+    kept as one value per server.
     Args:
-        ecs_data (list): The ECS data to be saved.
+        ecs_data (iterable): The ECS records to pivot.
+    Returns:
+        dict: A dictionary mapping each field name to the list of its values.
+    """
+    columns = {}
+    for ecs_info in ecs_data:
+        for key, value in ecs_info['Server Summary'].items():
+            columns.setdefault(key, []).append(value)
+        for key, value in ecs_info.items():
+            if key != 'Server Summary':
+                columns.setdefault(key, []).append(value)
+    return columns
+
+def save_columns_to_json(ecs_data, filename, indent):
+    """
+    Saves ECS data to a JSON file in column-oriented layout for analytics tools.
+    The file is written next to the target first and only replaces it once complete.
+    Args:
+        ecs_data (iterable): The ECS data to be saved.
         filename (str): The name of the file where the data will be saved.
+        indent (bool): Whether to pretty-print the output instead of minifying it.
     """
+    option = orjson.OPT_INDENT_2 if indent else None
+
+    temp_filename = f'{filename}.{os.getpid()}.tmp'
     try:
-        with open(filename, 'w') as json_file:
-            json.dump(ecs_data, json_file, indent=4)
+        with open(temp_filename, 'wb', buffering=WRITE_BUFFER_SIZE) as json_file:
+            json_file.write(orjson.dumps(to_columns(ecs_data), option=option))
+        os.replace(temp_filename, filename)
     except Exception as e:
-        raise RuntimeError(f"Failed to save data to JSON file: {str(e)}")
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+        raise RuntimeError(f"Failed to save columnar data to JSON file: {str(e)}")
 
 def main():
     """
     Main function to retrieve ECS instances and flavors and save the data to a JSON file.
     """
     try:
-        ecs_client = get_ecs_client()
-        flavor_dict = get_flavor_dict(ecs_client)
-        ecs_data = get_ecs_servers(ecs_client, flavor_dict)
-
-        # Get the current date and time for the filename
-        current_time = datetime.now().strftime('%Y%m%d_%H%M%S')
+        # Access environment variables
         ak = os.environ.get('HUAWEI_ACCESS_KEY')
+        sk = os.environ.get('HUAWEI_SECRET_KEY')
         project_id = os.environ.get('HUAWEI_PROJECT_ID')
         region = os.environ.get('HUAWEI_REGION')
 
+        # Ensure all necessary environment variables are set
+        if not all([ak, sk, project_id, region]):
+            raise ValueError("One or more environment variables are not set.")
+
+        # Output is minified unless indentation is requested via ECS_JSON_INDENT
+        indent = get_env_flag('ECS_JSON_INDENT')
+        # A column-oriented copy is also written when ECS_JSON_COLUMNAR is on
+        columnar = get_env_flag('ECS_JSON_COLUMNAR')
+
+        ecs_client = get_ecs_client(ak, sk, project_id, region)
+
+        # Flavors and servers are independent requests, so fetch them concurrently
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            flavor_future = executor.submit(get_flavor_dict, ecs_client)
+            servers_future = executor.submit(list_servers, ecs_client)
+            flavor_dict = flavor_future.result()
+            servers = servers_future.result()
+
+        ecs_data = get_ecs_servers(servers, flavor_dict, region)
+
+        # Get the current date and time for the filename
+        current_time = datetime.now().strftime('%Y%m%d_%H%M%S')
+
         # Format filename with environment variables and timestamp
         json_filename = f'ecs_summary_{ak}_{project_id}_{region}_{current_time}.json'
-        
+
+        # The columnar copy needs every record at once, so only then are they kept
+        rows = [] if columnar else None
+
         # Save the ECS data to JSON
-        save_data_to_json(ecs_data, json_filename)
+        save_data_to_json(ecs_data, json_filename, indent, rows)
         print(f"Data saved to {json_filename}")
 
+        if columnar:
+            columns_filename = f'ecs_summary_{ak}_{project_id}_{region}_{current_time}_columns.json'
+            save_columns_to_json(rows, columns_filename, indent)
+            print(f"Columnar data saved to {columns_filename}")
+
     except ValueError as ve:
         print(f"Configuration Error: {ve}")
-    except RuntimeError as re:
-        print(f"Runtime Error: {re}")
+    except RuntimeError as rte:
+        print(f"Runtime Error: {rte}")
     except Exception as e:
         print(f"Unexpected Error: {e}")
 